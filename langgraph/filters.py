@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta
+
+
+# Filtros aceitos em "buscar:" -> campo de metadata gravado na ingestão
+FILTER_FIELDS = {
+    "fonte": "source",
+    "usuario": "user_id",
+    "hash": "doc_hash",
+    "pagina": "page",
+}
+
+
+# ---------------------------------------------------------
+# FILTROS (PUSHDOWN PARA O "where" DO CHROMA)
+# ---------------------------------------------------------
+def _parse_date(value: str, end_of_day: bool = False) -> int:
+    # date.fromisoformat valida AAAA-MM-DD bem mais rápido que strptime,
+    # que dominava o custo de rotear um buscar: com desde=/ate=
+    try:
+        parsed = date.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Data inválida: '{value}'.")
+
+    day = datetime(parsed.year, parsed.month, parsed.day)
+
+    if end_of_day:
+        day += timedelta(days=1)
+        return int(day.timestamp()) - 1
+    return int(day.timestamp())
+
+
+def build_filter(source=None, user_id=None, doc_hash=None, page=None,
+                 since=None, until=None):
+    """
+    Monta a expressão `where` do Chroma a partir dos campos informados.
+    `since`/`until` são datas AAAA-MM-DD (inclusivas) sobre `uploaded_at`.
+    Retorna None quando nenhum filtro foi pedido.
+    """
+    clauses = []
+
+    if source is not None:
+        clauses.append({"source": source})
+    if user_id is not None:
+        clauses.append({"user_id": user_id})
+    if doc_hash is not None:
+        clauses.append({"doc_hash": doc_hash})
+    if page is not None:
+        clauses.append({"page": int(page)})
+    if since is not None:
+        clauses.append({"uploaded_at": {"$gte": _parse_date(since)}})
+    if until is not None:
+        clauses.append({"uploaded_at": {"$lte": _parse_date(until, end_of_day=True)}})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def parse_filter(parts):
+    """
+    Converte termos "chave=valor" (fonte, usuario, hash, pagina, desde, ate)
+    em uma expressão `where`. Levanta ValueError com mensagem para o usuário.
+    """
+    kwargs = {}
+
+    for part in parts:
+        if "=" not in part:
+            raise ValueError(f"Filtro inválido: '{part.strip()}' (esperado chave=valor).")
+
+        key, value = part.split("=", 1)
+        key, value = key.strip().lower(), value.strip()
+
+        if key in FILTER_FIELDS:
+            field = FILTER_FIELDS[key]
+            if field == "page":
+                try:
+                    number = int(value)
+                except ValueError:
+                    number = 0
+                if number < 1:
+                    raise ValueError(f"Página inválida: '{value}'.")
+                # PyPDFLoader numera páginas a partir de 0
+                value = number - 1
+            kwargs[field] = value
+        elif key == "desde":
+            kwargs["since"] = value
+        elif key == "ate":
+            kwargs["until"] = value
+        else:
+            raise ValueError(
+                f"Filtro desconhecido: '{key}' (disponíveis: fonte, usuario, hash, pagina, desde, ate)."
+            )
+
+    return build_filter(**kwargs)
+
+
+def parse_search(payload: str):
+    """
+    Separa o texto de "buscar:" em (consulta, filtro).
+    Formato: buscar: consulta ; fonte=relatorio.pdf ; desde=2024-01-01
+    """
+    query, *parts = payload.split(";")
+    return query.strip(), parse_filter([p for p in parts if p.strip()])
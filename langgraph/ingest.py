@@ -0,0 +1,371 @@
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from langgraph.rag import (
+    DEFAULT_COLLECTION, get_embeddings, get_vectorstore, document_hash, document_metadata
+)
+from langgraph.tools import log_action
+
+
+# Diretórios da fila de indexação
+JOB_DIR = "data/jobs"
+UPLOAD_DIR = "data/jobs/uploads"
+
+# Trechos embedados/gravados por lote (granularidade do progresso e do resume)
+BATCH_SIZE = 16
+
+# Estados possíveis de um job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+PENDING_STATES = (QUEUED, RUNNING)
+
+os.makedirs(JOB_DIR, exist_ok=True)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+
+class JobCancelled(Exception):
+    """Levantada pelo worker quando o usuário cancela o job."""
+
+
+# ----------------------------------------------------------
+# 1. PERSISTÊNCIA DOS JOBS
+# ----------------------------------------------------------
+# Cada job é um arquivo data/jobs/<job_id>.json (mesmo esquema de
+# data/logs/votes/<task_id>.json). Toda leitura-modificação-escrita passa
+# por _JOB_LOCK para que o worker não sobrescreva um pedido de cancelamento.
+_JOB_LOCK = threading.Lock()
+
+
+def _job_path(job_id: str) -> str:
+    return f"{JOB_DIR}/{job_id}.json"
+
+
+def _read_job(job_id: str):
+    path = _job_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_job(job: dict):
+    # Escrita atômica: um refresh do navegador nunca lê um JSON pela metade
+    path = _job_path(job["id"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _update_job(job_id: str, **fields):
+    with _JOB_LOCK:
+        job = _read_job(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        job["heartbeat"] = time.time()
+        job["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        _write_job(job)
+        return job
+
+
+def get_job(job_id: str):
+    """
+    Retorna o estado atual de um job (para polling pela interface).
+    """
+    with _JOB_LOCK:
+        return _read_job(job_id)
+
+
+def list_jobs():
+    """
+    Lista todos os jobs, do mais recente para o mais antigo.
+    """
+    jobs = []
+    with _JOB_LOCK:
+        for name in os.listdir(JOB_DIR):
+            if name.endswith(".json"):
+                job = _read_job(name[:-len(".json")])
+                if job is not None:
+                    jobs.append(job)
+
+    return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+
+def cancel_job(job_id: str):
+    """
+    Pede o cancelamento de um job. Jobs ainda na fila são cancelados na
+    hora; jobs em execução param no próximo lote.
+    """
+    with _JOB_LOCK:
+        job = _read_job(job_id)
+        if job is None:
+            return {"error": "Job não encontrado."}
+        if job["status"] not in PENDING_STATES:
+            return {"error": f"Job já finalizado ({job['status']})."}
+
+        job["cancel_requested"] = True
+        if job["status"] == QUEUED:
+            job["status"] = CANCELLED
+            if os.path.exists(job["path"]):
+                os.remove(job["path"])
+        job["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        _write_job(job)
+        return job
+
+
+# ----------------------------------------------------------
+# 2. PROCESSAMENTO DE UM JOB
+# ----------------------------------------------------------
+# Um único writer (instância Chroma + lock) por coleção: dois jobs
+# indexando ao mesmo tempo não disputam o mesmo diretório vectorstore/.
+_WRITERS = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def _get_writer(collection_name: str):
+    with _WRITERS_LOCK:
+        if collection_name not in _WRITERS:
+            _WRITERS[collection_name] = (get_vectorstore(collection_name), threading.Lock())
+        return _WRITERS[collection_name]
+
+
+def _parse_pdf(path: str):
+    loader = PyPDFLoader(path)
+    try:
+        return loader.load_and_split()
+    except Exception:
+        return loader.load()
+
+
+def _check_cancel(job_id: str):
+    job = get_job(job_id)
+    if job is None or job.get("cancel_requested"):
+        raise JobCancelled()
+
+
+# Dono de um job RUNNING: "<pid>:<pool_id>". Pools criados neste processo
+# ficam registrados aqui enquanto o processo vive (um "Clear cache" do
+# Streamlit cria um pool novo, mas as threads do antigo continuam rodando).
+_LIVE_POOLS = set()
+
+# Sem heartbeat por esse tempo, o dono de outro processo é considerado morto
+STALE_AFTER = 300
+
+
+def _owner_alive(job: dict) -> bool:
+    owner = job.get("owner")
+    if not owner:
+        return False
+    if owner in _LIVE_POOLS:
+        return True
+    if owner.split(":", 1)[0] == str(os.getpid()):
+        # Mesmo pid, mas pool desconhecido: pid reaproveitado após restart
+        return False
+    return time.time() - job.get("heartbeat", 0) < STALE_AFTER
+
+
+def _claim_job(job_id: str, owner: str):
+    """
+    Passa o job para RUNNING em nome de `owner` na mesma seção crítica que
+    verifica o status. Um job RUNNING só é assumido se o dono anterior não
+    existe mais. Retorna None se o job não existe, já terminou ou está em
+    execução por outro worker vivo.
+    """
+    with _JOB_LOCK:
+        job = _read_job(job_id)
+        if job is None or job["status"] not in PENDING_STATES:
+            return None
+        if job["status"] == RUNNING and (job.get("owner") == owner or _owner_alive(job)):
+            return None
+
+        job["status"] = RUNNING
+        job["owner"] = owner
+        job["heartbeat"] = time.time()
+        job["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        _write_job(job)
+        return job
+
+
+def _discard_job(job: dict):
+    """
+    Remove os trechos já gravados pelo job e o PDF enviado.
+    """
+    vectorstore, write_lock = _get_writer(job["collection"])
+    with write_lock:
+        vectorstore._collection.delete(where={"job_id": job["id"]})
+
+    if os.path.exists(job["path"]):
+        os.remove(job["path"])
+
+
+def run_job(job_id: str, owner: str):
+    """
+    Executa (ou retoma) um job: parse -> embeddings -> gravação em lotes.
+    Os ids dos trechos são determinísticos (id do job + posição), então
+    retomar após um restart regrava no máximo um lote, sem duplicar.
+    Cancelamento ou falha removem os trechos já gravados pelo job.
+    """
+    job = _claim_job(job_id, owner)
+    if job is None:
+        return
+
+    try:
+        _check_cancel(job_id)
+        chunks = _parse_pdf(job["path"])
+        _update_job(job_id, chunks_parsed=len(chunks), total_chunks=len(chunks))
+
+        vectorstore, write_lock = _get_writer(job["collection"])
+        start = job.get("chunks_stored", 0)
+
+        for i in range(start, len(chunks), BATCH_SIZE):
+            _check_cancel(job_id)
+
+            batch = chunks[i:i + BATCH_SIZE]
+            texts = [c.page_content for c in batch]
+            vectors = get_embeddings().embed_documents(texts)
+            _update_job(job_id, chunks_embedded=i + len(batch))
+
+            with write_lock:
+                vectorstore._collection.upsert(
+                    ids=[f"{job['id']}-{i + n}" for n in range(len(batch))],
+                    embeddings=vectors,
+                    documents=texts,
+                    metadatas=[
+                        {
+                            **document_metadata(c.metadata, job["filename"], job["doc_hash"],
+                                                job["user"], job["uploaded_at"]),
+                            "job_id": job["id"],
+                        }
+                        for c in batch
+                    ]
+                )
+            _update_job(job_id, chunks_stored=i + len(batch))
+
+    except JobCancelled:
+        _discard_job(job)
+        _update_job(job_id, status=CANCELLED)
+        return
+    except Exception as e:
+        try:
+            _discard_job(job)
+        finally:
+            _update_job(job_id, status=FAILED, error=str(e))
+        return
+
+    job = _update_job(job_id, status=DONE)
+    if job is None:
+        return
+    if os.path.exists(job["path"]):
+        os.remove(job["path"])
+
+    log_action({
+        "type": "index",
+        "job": job_id,
+        "file": job["filename"],
+        "count": job["chunks_stored"],
+        "user": job["user"]
+    })
+
+
+# ----------------------------------------------------------
+# 3. POOL DE WORKERS
+# ----------------------------------------------------------
+class IngestWorkerPool:
+    """
+    Pool de threads que consome a fila de indexação fora do ciclo de
+    execução do Streamlit. Ao iniciar, recoloca na fila os jobs que
+    ficaram pendentes (queued/running) de uma execução anterior; jobs
+    RUNNING só são assumidos se o dono não existe mais (ver _claim_job).
+    """
+
+    def __init__(self, workers: int = 2):
+        self._queue = queue.Queue()
+        self._threads = []
+        self._workers = workers
+        self.owner = f"{os.getpid()}:{str(uuid.uuid4())[:8]}"
+        _LIVE_POOLS.add(self.owner)
+
+    def _recover(self):
+        for job in reversed(list_jobs()):
+            if job["status"] == QUEUED or (job["status"] == RUNNING and not _owner_alive(job)):
+                self._queue.put(job["id"])
+
+    def start(self):
+        self._recover()
+
+        for _ in range(self._workers):
+            t = threading.Thread(target=self._loop, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        return self
+
+    def _loop(self):
+        while True:
+            try:
+                job_id = self._queue.get(timeout=STALE_AFTER)
+            except queue.Empty:
+                # Fila ociosa: assume jobs de donos que pararam de dar heartbeat
+                self._recover()
+                continue
+
+            try:
+                run_job(job_id, self.owner)
+            except Exception as e:
+                # Um erro fora do try de run_job (ex.: log_action) não pode
+                # derrubar o worker: o job é marcado como falho e o loop segue.
+                try:
+                    _update_job(job_id, status=FAILED, error=str(e))
+                except Exception:
+                    pass
+            finally:
+                self._queue.task_done()
+
+    def submit(self, file_bytes, filename: str, user: str,
+               collection_name: str = DEFAULT_COLLECTION):
+        """
+        Salva o PDF em disco, registra o job e o coloca na fila.
+        Retorna o id do job para acompanhamento via get_job().
+        """
+        job_id = f"job_{str(uuid.uuid4())[:8]}"
+        path = f"{UPLOAD_DIR}/{job_id}.pdf"
+
+        with open(path, "wb") as f:
+            f.write(file_bytes)
+
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        job = {
+            "id": job_id,
+            "filename": filename,
+            "path": path,
+            "doc_hash": document_hash(file_bytes),
+            "uploaded_at": int(time.time()),
+            "collection": collection_name,
+            "user": user,
+            "status": QUEUED,
+            "cancel_requested": False,
+            "total_chunks": None,
+            "chunks_parsed": 0,
+            "chunks_embedded": 0,
+            "chunks_stored": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        with _JOB_LOCK:
+            _write_job(job)
+
+        self._queue.put(job_id)
+        return job_id
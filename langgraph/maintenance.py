@@ -0,0 +1,449 @@
+"""
+Manutenção do vectorstore: estatísticas, remoção por documento, rebuild
+com parâmetros HNSW, vacuum do SQLite e sweep de ef_search.
+
+Rode com o app parado (o Chroma não compartilha o diretório entre
+processos com segurança), a partir da raiz do projeto:
+    python langgraph/maintenance.py stats
+    python langgraph/maintenance.py delete relatorio.pdf
+    python langgraph/maintenance.py rebuild --m 32 --ef-construction 200 --ef-search 64
+    python langgraph/maintenance.py vacuum
+    python langgraph/maintenance.py sweep --ef 10 20 40 80 160 --holdout 50
+"""
+import os
+import json
+import time
+import uuid
+import random
+import shutil
+import sqlite3
+import argparse
+
+import numpy as np
+import chromadb
+
+from rag import VECTORSTORE_DIR, DEFAULT_COLLECTION, get_embeddings, exact_neighbors, collection_space
+from tools import log_action
+
+
+SQLITE_FILE = os.path.join(VECTORSTORE_DIR, "chroma.sqlite3")
+
+# Lotes de leitura/escrita ao copiar coleções
+BATCH_SIZE = 256
+
+# Parâmetros HNSW via metadata da coleção ("hnsw:*"), aceita pelo Chroma
+# 0.4/0.5 e convertida para `configuration` nas versões 1.x
+HNSW_KEYS = {
+    "m": "hnsw:M",
+    "ef_construction": "hnsw:construction_ef",
+    "ef_search": "hnsw:search_ef",
+}
+
+
+def get_client():
+    return chromadb.PersistentClient(path=VECTORSTORE_DIR)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _is_uuid(name: str) -> bool:
+    try:
+        return str(uuid.UUID(name)) == name.lower()
+    except ValueError:
+        return False
+
+
+def _segment_dirs():
+    # Cada segmento vetorial persiste em vectorstore/<segment_id>/ (UUID).
+    # Outras pastas em vectorstore/ não são do Chroma e nunca são tocadas.
+    return [
+        name for name in os.listdir(VECTORSTORE_DIR)
+        if _is_uuid(name) and os.path.isdir(os.path.join(VECTORSTORE_DIR, name))
+    ]
+
+
+def _known_segments():
+    with sqlite3.connect(SQLITE_FILE) as conn:
+        return {row[0] for row in conn.execute("SELECT id FROM segments")}
+
+
+def _iter_records(collection, include=("embeddings", "documents", "metadatas")):
+    # Paginação por offset: a coleção não muda durante a manutenção
+    offset = 0
+    while True:
+        page = collection.get(limit=BATCH_SIZE, offset=offset, include=list(include))
+        if not page["ids"]:
+            return
+        yield page
+        offset += len(page["ids"])
+
+
+def hnsw_params(collection) -> dict:
+    """
+    Parâmetros HNSW atuais da coleção (space, m, ef_construction, ef_search).
+    """
+    config = getattr(collection, "configuration", None) or {}
+    hnsw = config.get("hnsw") if isinstance(config, dict) else None
+
+    if hnsw:
+        return {
+            "space": collection_space(collection),
+            "m": hnsw.get("max_neighbors"),
+            "ef_construction": hnsw.get("ef_construction"),
+            "ef_search": hnsw.get("ef_search"),
+        }
+
+    metadata = collection.metadata or {}
+    params = {"space": collection_space(collection)}
+    for name, key in HNSW_KEYS.items():
+        params[name] = metadata.get(key)
+    return params
+
+
+def _collection_metadata(base: dict, params: dict) -> dict:
+    metadata = {k: v for k, v in (base or {}).items() if not k.startswith("hnsw:")}
+    metadata["hnsw:space"] = params.get("space") or "l2"
+    for name, key in HNSW_KEYS.items():
+        if params.get(name) is not None:
+            metadata[key] = int(params[name])
+    return metadata
+
+
+# ----------------------------------------------------------
+# 1. ESTATÍSTICAS
+# ----------------------------------------------------------
+def collection_stats(collection_name: str = DEFAULT_COLLECTION) -> dict:
+    """
+    Total de trechos, trechos por documento, parâmetros HNSW e uso de disco.
+    """
+    collection = get_client().get_collection(collection_name)
+
+    sources = {}
+    for page in _iter_records(collection, include=("metadatas",)):
+        for meta in page["metadatas"]:
+            source = (meta or {}).get("source", "?")
+            sources[source] = sources.get(source, 0) + 1
+
+    known = _known_segments()
+    segment_dirs = _segment_dirs()
+
+    return {
+        "collection": collection_name,
+        "count": collection.count(),
+        "sources": sources,
+        "hnsw": hnsw_params(collection),
+        "sqlite_bytes": os.path.getsize(SQLITE_FILE),
+        "segments_bytes": sum(_dir_size(os.path.join(VECTORSTORE_DIR, d)) for d in segment_dirs),
+        "orphan_segments": [d for d in segment_dirs if d not in known],
+    }
+
+
+# ----------------------------------------------------------
+# 2. REMOÇÃO POR DOCUMENTO
+# ----------------------------------------------------------
+def delete_by_source(source: str, collection_name: str = DEFAULT_COLLECTION) -> int:
+    """
+    Remove todos os trechos de um documento (metadata `source`).
+    Retorna a quantidade removida.
+    """
+    collection = get_client().get_collection(collection_name)
+    ids = collection.get(where={"source": source}, include=[])["ids"]
+
+    if ids:
+        collection.delete(ids=ids)
+
+    log_action({"type": "index_delete", "collection": collection_name,
+                "source": source, "count": len(ids)})
+    return len(ids)
+
+
+# ----------------------------------------------------------
+# 3. REBUILD / COMPACTAÇÃO
+# ----------------------------------------------------------
+def rebuild_collection(collection_name: str = DEFAULT_COLLECTION, m=None,
+                       ef_construction=None, ef_search=None) -> dict:
+    """
+    Recria a coleção a partir dos embeddings já gravados (sem reprocessar
+    PDFs). O índice HNSW novo não carrega entradas removidas nem a
+    fragmentação dos adds incrementais. Parâmetros não informados mantêm
+    o valor atual.
+
+    A cópia é montada por completo numa coleção temporária antes de a
+    original ser apagada: uma falha no meio não perde dados.
+    """
+    client = get_client()
+    source = client.get_collection(collection_name)
+
+    params = hnsw_params(source)
+    for name, value in (("m", m), ("ef_construction", ef_construction), ("ef_search", ef_search)):
+        if value is not None:
+            params[name] = value
+
+    tmp_name = f"{collection_name}__rebuild_{str(uuid.uuid4())[:8]}"
+    target = client.create_collection(
+        tmp_name, metadata=_collection_metadata(source.metadata, params)
+    )
+
+    try:
+        for page in _iter_records(source):
+            target.add(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"]
+            )
+    except Exception:
+        client.delete_collection(tmp_name)
+        raise
+
+    count = target.count()
+    client.delete_collection(collection_name)
+    target.modify(name=collection_name)
+
+    log_action({"type": "index_rebuild", "collection": collection_name,
+                "count": count, "hnsw": params})
+    return {"collection": collection_name, "count": count, "hnsw": params}
+
+
+# ----------------------------------------------------------
+# 4. VACUUM
+# ----------------------------------------------------------
+def _log_stats(conn) -> dict:
+    """
+    Linhas e bytes ocupados pelo log de escrita (tabela embeddings_queue).
+    """
+    rows = conn.execute("SELECT COUNT(*) FROM embeddings_queue").fetchone()[0]
+    try:
+        size = conn.execute(
+            "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = 'embeddings_queue'"
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        size = None  # SQLite compilado sem a tabela virtual dbstat
+    return {"rows": rows, "bytes": size}
+
+
+def _purge_log(conn) -> int:
+    """
+    Remove do embeddings_queue as entradas que todos os segmentos da
+    coleção já consumiram (mesma regra do `chroma utils vacuum`): apaga
+    seq_id abaixo do menor max_seq_id dos segmentos. Um segmento sem
+    registro em max_seq_id conta como -1 e bloqueia a limpeza da coleção;
+    a última entrada sempre fica, para o Chroma não reaproveitar seq_ids.
+    """
+    purged = 0
+    collections = [row[0] for row in conn.execute("SELECT id FROM collections")]
+
+    for collection_id in collections:
+        seq_ids = [
+            row[0] for row in conn.execute(
+                "SELECT COALESCE(m.seq_id, -1) FROM segments s "
+                "LEFT JOIN max_seq_id m ON s.id = m.segment_id "
+                "WHERE s.collection = ?",
+                (collection_id,)
+            )
+        ]
+        if not seq_ids:
+            continue
+
+        # Tópico do log: "<tipo>://<tenant>/<namespace>/<collection_id>"
+        cur = conn.execute(
+            "DELETE FROM embeddings_queue WHERE seq_id < ? AND topic LIKE ?",
+            (min(seq_ids), f"%/{collection_id}")
+        )
+        purged += cur.rowcount
+
+    return purged
+
+
+def vacuum(remove_orphans: bool = True) -> dict:
+    """
+    Remove diretórios de segmentos que não pertencem a nenhuma coleção,
+    limpa do log (embeddings_queue) as entradas já aplicadas aos segmentos
+    e roda VACUUM no chroma.sqlite3 para devolver as páginas livres ao disco.
+    Um VACUUM sozinho não apaga linhas: sem a limpeza o log continua ocupando
+    o mesmo espaço.
+    """
+    before = _dir_size(VECTORSTORE_DIR)
+
+    removed = []
+    if remove_orphans:
+        known = _known_segments()
+        for name in _segment_dirs():
+            if name not in known:
+                shutil.rmtree(os.path.join(VECTORSTORE_DIR, name))
+                removed.append(name)
+
+    # VACUUM não roda dentro de transação: autocommit, com a limpeza do
+    # log numa transação explícita
+    conn = sqlite3.connect(SQLITE_FILE, isolation_level=None)
+    try:
+        log_before = _log_stats(conn)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            purged = _purge_log(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        conn.execute("VACUUM")
+        # Registro lido pelo Chroma para saber se o banco já passou por vacuum
+        conn.execute(
+            "INSERT INTO maintenance_log (operation, timestamp) VALUES ('vacuum', CURRENT_TIMESTAMP)"
+        )
+        log_after = _log_stats(conn)
+    finally:
+        conn.close()
+
+    after = _dir_size(VECTORSTORE_DIR)
+
+    log_action({"type": "index_vacuum", "freed_bytes": before - after,
+                "orphan_segments": removed, "log_entries_purged": purged})
+    return {
+        "bytes_before": before,
+        "bytes_after": after,
+        "orphan_segments": removed,
+        "log_entries_purged": purged,
+        "log_before": log_before,
+        "log_after": log_after,
+    }
+
+
+# ----------------------------------------------------------
+# 5. SWEEP DE ef_search (RECALL x LATÊNCIA)
+# ----------------------------------------------------------
+def ef_search_sweep(ef_values, collection_name: str = DEFAULT_COLLECTION, k: int = 3,
+                    queries=None, holdout: int = 50, seed: int = 0):
+    """
+    Mede recall@k (contra busca exata) e latência por consulta para cada
+    valor de ef_search, mantendo M/ef_construction da coleção.
+
+    `queries` é uma lista de textos; sem ela, `holdout` trechos sorteados
+    da coleção viram consultas e ficam fora do índice avaliado. Cada valor
+    de ef_search é medido numa cópia em memória: a coleção persistida não
+    é alterada.
+    """
+    source = get_client().get_collection(collection_name)
+    params = hnsw_params(source)
+
+    ids, vectors = [], []
+    for page in _iter_records(source, include=("embeddings",)):
+        ids.extend(page["ids"])
+        vectors.extend(page["embeddings"])
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    if queries:
+        # Único ponto que precisa do modelo de embeddings (carregado aqui)
+        query_vectors = np.asarray(get_embeddings().embed_documents(queries), dtype=np.float32)
+        keep = np.arange(len(ids))
+    else:
+        rng = random.Random(seed)
+        held = set(rng.sample(range(len(ids)), min(holdout, len(ids) // 2)))
+        query_vectors = vectors[sorted(held)]
+        keep = np.array([i for i in range(len(ids)) if i not in held])
+
+    if len(query_vectors) == 0:
+        raise ValueError("Nenhuma consulta para o sweep (coleção pequena demais para holdout).")
+
+    index_ids = [ids[i] for i in keep]
+    index_vectors = vectors[keep]
+    k = min(k, len(index_ids))
+
+    exact = exact_neighbors(index_vectors, query_vectors, k, params["space"])
+    truth = [{index_ids[j] for j in row} for row in exact]
+
+    client = chromadb.EphemeralClient()
+    results = []
+
+    for ef in ef_values:
+        name = f"sweep_{str(uuid.uuid4())[:8]}"
+        collection = client.create_collection(
+            name, metadata=_collection_metadata({}, {**params, "ef_search": ef})
+        )
+        for start in range(0, len(index_ids), BATCH_SIZE):
+            collection.add(
+                ids=index_ids[start:start + BATCH_SIZE],
+                embeddings=index_vectors[start:start + BATCH_SIZE].tolist()
+            )
+
+        latencies, recalls = [], []
+        for query, expected in zip(query_vectors.tolist(), truth):
+            t0 = time.perf_counter()
+            found = collection.query(query_embeddings=[query], n_results=k, include=[])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            recalls.append(len(expected & set(found["ids"][0])) / k)
+
+        client.delete_collection(name)
+
+        results.append({
+            "ef_search": ef,
+            "recall": float(np.mean(recalls)),
+            "latency_ms_mean": float(np.mean(latencies)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+        })
+
+    return results
+
+
+# ----------------------------------------------------------
+# CLI
+# ----------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do vectorstore (Chroma).")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats", help="estatísticas da coleção")
+
+    p_delete = sub.add_parser("delete", help="remove os trechos de um documento")
+    p_delete.add_argument("source", help="nome do arquivo (metadata source)")
+
+    p_rebuild = sub.add_parser("rebuild", help="recria/compacta a coleção")
+    p_rebuild.add_argument("--m", type=int)
+    p_rebuild.add_argument("--ef-construction", type=int)
+    p_rebuild.add_argument("--ef-search", type=int)
+
+    p_vacuum = sub.add_parser("vacuum", help="VACUUM do SQLite e limpeza de segmentos órfãos")
+    p_vacuum.add_argument("--keep-orphans", action="store_true")
+
+    p_sweep = sub.add_parser("sweep", help="recall/latência por ef_search")
+    p_sweep.add_argument("--ef", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    p_sweep.add_argument("--k", type=int, default=3)
+    p_sweep.add_argument("--queries", help="arquivo com uma consulta por linha")
+    p_sweep.add_argument("--holdout", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        result = collection_stats(args.collection)
+    elif args.command == "delete":
+        result = {"deleted": delete_by_source(args.source, args.collection)}
+    elif args.command == "rebuild":
+        result = rebuild_collection(args.collection, args.m, args.ef_construction, args.ef_search)
+    elif args.command == "vacuum":
+        result = vacuum(remove_orphans=not args.keep_orphans)
+    else:
+        queries = None
+        if args.queries:
+            with open(args.queries, "r", encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip()]
+
+        rows = ef_search_sweep(args.ef, args.collection, args.k, queries, args.holdout)
+        print(f"{'ef_search':>9} {'recall@' + str(args.k):>9} {'média ms':>9} {'p95 ms':>9}")
+        for row in rows:
+            print(f"{row['ef_search']:>9} {row['recall']:>9.3f} "
+                  f"{row['latency_ms_mean']:>9.2f} {row['latency_ms_p95']:>9.2f}")
+        return
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
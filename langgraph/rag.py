@@ -1,5 +1,9 @@
 import os
+import time
 import uuid
+import hashlib
+import numpy as np
+from langchain_core.documents import Document
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
@@ -12,16 +16,51 @@ os.makedirs(VECTORSTORE_DIR, exist_ok=True)
 # Nome padrão da coleção usada pelo workflow
 DEFAULT_COLLECTION = "pdf_collection"
 
-# Embeddings totalmente offline
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+# Embeddings totalmente offline. O modelo é carregado no primeiro uso, não
+# no import: scripts como maintenance.py importam este módulo sem precisar dele.
+_embeddings = None
+
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = HuggingFaceEmbeddings(
+            model_name="sentence-transformers/all-MiniLM-L6-v2"
+        )
+    return _embeddings
+
+
+# ---------------------------------------------------------
+# METADATA ESTRUTURADA DOS DOCUMENTOS
+# ---------------------------------------------------------
+def document_hash(file_bytes) -> str:
+    """
+    Hash curto do conteúdo do arquivo (identifica o documento).
+    """
+    return hashlib.sha256(file_bytes).hexdigest()[:16]
+
+
+def document_metadata(page_metadata: dict, filename: str, doc_hash: str,
+                      user_id: str, uploaded_at: int) -> dict:
+    """
+    Metadata gravada em cada trecho indexado. Substitui o "source" do
+    PyPDFLoader (caminho temporário) pelo nome do arquivo enviado.
+    `uploaded_at` é um epoch em segundos para permitir filtros por data.
+    """
+    return {
+        **page_metadata,
+        "source": filename,
+        "user_id": user_id,
+        "uploaded_at": int(uploaded_at),
+        "page": int(page_metadata.get("page", 0)),
+        "doc_hash": doc_hash,
+    }
 
 
 # ---------------------------------------------------------
 # CARREGAR PDF (COMPATÍVEL COM WINDOWS)
 # ---------------------------------------------------------
-def load_pdf(file_bytes, filename: str):
+def load_pdf(file_bytes, filename: str, user_id: str = "desconhecido"):
     """
     Salva o PDF temporariamente e carrega suas páginas.
     Funciona em Windows e Linux.
@@ -37,6 +76,11 @@ def load_pdf(file_bytes, filename: str):
     # Remover arquivo temporário
     os.remove(temp_path)
 
+    doc_hash = document_hash(file_bytes)
+    uploaded_at = int(time.time())
+    for page in pages:
+        page.metadata = document_metadata(page.metadata, filename, doc_hash, user_id, uploaded_at)
+
     return pages
 
 
@@ -50,7 +94,7 @@ def build_vectorstore(docs, collection_name: str = DEFAULT_COLLECTION):
     """
     vectorstore = Chroma.from_documents(
         documents=docs,
-        embedding=embeddings,
+        embedding=get_embeddings(),
         persist_directory=VECTORSTORE_DIR,
         collection_name=collection_name
     )
@@ -62,31 +106,113 @@ def build_vectorstore(docs, collection_name: str = DEFAULT_COLLECTION):
 # ---------------------------------------------------------
 # RETRIEVER PADRÃO PARA O WORKFLOW
 # ---------------------------------------------------------
-def get_retriever(collection_name: str = DEFAULT_COLLECTION):
+def get_vectorstore(collection_name: str = DEFAULT_COLLECTION):
     """
-    Carrega a coleção salva e retorna seu retriever.
+    Abre a coleção persistida (sem adicionar documentos).
     """
-    vectorstore = Chroma(
+    return Chroma(
         persist_directory=VECTORSTORE_DIR,
         collection_name=collection_name,
-        embedding_function=embeddings
+        embedding_function=get_embeddings()
     )
 
-    # Some versions of the vectorstore retriever object may not expose
-    # `get_relevant_documents` directly. Provide a small wrapper that
-    # guarantees this method is available and delegates to the underlying
-    # vectorstore `similarity_search` implementation.
-    class _SimpleRetriever:
-        def __init__(self, vs, k=3):
-            self._vs = vs
-            self._k = k
 
-        def get_relevant_documents(self, query: str):
-            return self._vs.similarity_search(query, k=self._k)
+# Filtros que casam com até EXACT_SEARCH_LIMIT trechos são ranqueados por
+# distância exata em numpy; acima disso vale a busca HNSW filtrada do Chroma.
+# Ler os vetores custa ~0,025 ms por trecho, então o ganho some perto de
+# algumas centenas (ver scripts/bench_filters.py).
+EXACT_SEARCH_LIMIT = 200
+
 
-        # keep compatibility with some calling code that may use different
-        # method names in other environments
-        def get_relevant_documents_with_scores(self, query: str):
-            return self._vs.similarity_search_with_score(query, k=self._k)
+def collection_space(collection) -> str:
+    """
+    Métrica de distância da coleção (l2, cosine ou ip).
+    """
+    config = getattr(collection, "configuration", None) or {}
+    hnsw = config.get("hnsw") if isinstance(config, dict) else None
+    if hnsw and hnsw.get("space"):
+        return hnsw["space"]
+    return (collection.metadata or {}).get("hnsw:space", "l2")
 
+
+def exact_neighbors(index_vectors, query_vectors, k: int, space: str = "l2"):
+    """
+    Índices dos k vizinhos exatos de cada consulta (uma linha por consulta),
+    na mesma métrica do índice HNSW.
+    """
+    index_vectors = np.asarray(index_vectors, dtype=np.float32)
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+
+    if space == "cosine":
+        index_vectors = index_vectors / np.linalg.norm(index_vectors, axis=1, keepdims=True)
+        query_vectors = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        distances = -query_vectors @ index_vectors.T
+    elif space == "ip":
+        distances = -query_vectors @ index_vectors.T
+    else:
+        distances = (
+            (query_vectors ** 2).sum(axis=1, keepdims=True)
+            - 2 * query_vectors @ index_vectors.T
+            + (index_vectors ** 2).sum(axis=1)
+        )
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+# Some versions of the vectorstore retriever object may not expose
+# `get_relevant_documents` directly. Provide a small wrapper that
+# guarantees this method is available and delegates to the underlying
+# vectorstore `similarity_search` implementation.
+class _SimpleRetriever:
+    def __init__(self, vs, k=3, exact_limit=EXACT_SEARCH_LIMIT):
+        self._vs = vs
+        self._k = k
+        self._exact_limit = exact_limit
+
+    def get_relevant_documents(self, query: str, filter=None):
+        # `filter` é uma expressão `where` do Chroma (ver filters.build_filter):
+        # a restrição é aplicada dentro da consulta, não depois dela.
+        if filter:
+            # Busca HNSW filtrada é mais lenta que a não filtrada. Se o filtro
+            # casa com poucos trechos, buscar só os vetores deles e ranquear por
+            # distância exata sai mais barato (e com recall 1). Texto e metadata
+            # são lidos depois, apenas para os k escolhidos.
+            found = self._vs._collection.get(
+                where=filter,
+                limit=self._exact_limit + 1,
+                include=["embeddings"]
+            )
+            ids = found["ids"]
+            if len(ids) <= self._exact_limit:
+                if len(ids) <= self._k:
+                    chosen = list(ids)
+                else:
+                    query_vector = self._vs.embeddings.embed_query(query)
+                    order = exact_neighbors(found["embeddings"], [query_vector], self._k,
+                                            collection_space(self._vs._collection))[0]
+                    chosen = [ids[i] for i in order]
+                return self._documents(chosen)
+
+        return self._vs.similarity_search(query, k=self._k, filter=filter)
+
+    def _documents(self, ids):
+        if not ids:
+            return []
+        found = self._vs._collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = dict(zip(found["ids"], zip(found["documents"], found["metadatas"])))
+        return [
+            Document(page_content=by_id[i][0], metadata=by_id[i][1] or {})
+            for i in ids if i in by_id
+        ]
+
+    # keep compatibility with some calling code that may use different
+    # method names in other environments
+    def get_relevant_documents_with_scores(self, query: str, filter=None):
+        return self._vs.similarity_search_with_score(query, k=self._k, filter=filter)
+
+
+def get_retriever(collection_name: str = DEFAULT_COLLECTION):
+    """
+    Carrega a coleção salva e retorna seu retriever.
+    """
+    vectorstore = get_vectorstore(collection_name)
     return _SimpleRetriever(vectorstore, k=3)
@@ -0,0 +1,303 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Importável como langgraph.router (streamlit_app.py) e como router
+# (scripts executados de dentro de langgraph/, ex.: workflow.py)
+try:
+    from langgraph.filters import parse_search
+except ImportError:
+    from filters import parse_search
+
+
+# ----------------------------------------------------------
+# 1. RESULTADOS TIPADOS
+# ----------------------------------------------------------
+@dataclass(frozen=True)
+class SearchCommand:
+    query: str
+    filter: Optional[Dict[str, Any]] = None
+
+    def to_state(self):
+        return {"tool": "rag", "query": self.query, "filter": self.filter}
+
+
+@dataclass(frozen=True)
+class SummarizeCommand:
+    text: str
+
+    def to_state(self):
+        return {"tool": "summarizer", "text": self.text}
+
+
+@dataclass(frozen=True)
+class VoteCommand:
+    topic: str
+    choice: str
+
+    def to_state(self):
+        return {"tool": "vote", "topic": self.topic, "choice": self.choice}
+
+
+@dataclass(frozen=True)
+class TaskCommand:
+    desc: str
+    user: str
+    deadline: str
+
+    def to_state(self):
+        return {"tool": "task", "desc": self.desc, "user": self.user, "deadline": self.deadline}
+
+
+@dataclass(frozen=True)
+class HelpCommand:
+    text: str
+
+
+@dataclass(frozen=True)
+class Question:
+    """
+    Mensagem sem comando. `intent` vem do classificador ("rag" ou "chat")
+    ou é None quando o roteador não tem classificador.
+    """
+    text: str
+    intent: Optional[str] = None
+
+    def to_state(self):
+        return {"tool": "rag", "query": self.text, "filter": None}
+
+
+@dataclass(frozen=True)
+class RouteError:
+    """
+    Erro de formato de um comando (não é exceção: vira resposta ao usuário).
+    """
+    command: str
+    message: str
+    usage: str
+
+    def __str__(self):
+        return f"{self.message} Use: {self.usage}"
+
+
+# ----------------------------------------------------------
+# 2. PARSERS DOS COMANDOS
+# ----------------------------------------------------------
+# Cada parser recebe o texto após o prefixo (com maiúsculas preservadas) e
+# retorna um resultado tipado ou levanta ValueError com a mensagem de erro.
+def _split_fields(payload: str, count: int):
+    parts = [p.strip() for p in payload.split(";")]
+    if len(parts) != count or not all(parts):
+        raise ValueError("Formato inválido.")
+    return parts
+
+
+def parse_buscar(payload: str):
+    query, where = parse_search(payload)
+    if not query:
+        raise ValueError("Consulta vazia.")
+    return SearchCommand(query, where)
+
+
+def parse_resumir(payload: str):
+    return SummarizeCommand(payload.strip())
+
+
+def parse_votar(payload: str):
+    topic, choice = _split_fields(payload, 2)
+    return VoteCommand(topic, choice)
+
+
+def parse_tarefa(payload: str):
+    desc, user, deadline = _split_fields(payload, 3)
+    return TaskCommand(desc, user, deadline)
+
+
+# ----------------------------------------------------------
+# 3. CLASSIFICADOR DE INTENÇÃO (OPCIONAL)
+# ----------------------------------------------------------
+# Frases de referência por intenção; cada intenção vira um centróide.
+INTENT_EXAMPLES = {
+    "rag": [
+        "o que o documento diz sobre isso?",
+        "segundo o pdf, qual é o prazo?",
+        "qual o valor informado no relatório?",
+        "resuma o capítulo sobre metodologia",
+        "quais são os requisitos descritos no arquivo?",
+        "onde o texto fala sobre orçamento?",
+    ],
+    "chat": [
+        "olá, tudo bem?",
+        "bom dia",
+        "obrigado pela ajuda",
+        "quem é você?",
+        "me conte uma piada",
+        "como você funciona?",
+    ],
+}
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class EmbeddingIntentClassifier:
+    """
+    Classifica perguntas livres por similaridade de cosseno com o centróide
+    dos exemplos de cada intenção. Custa um embedding da consulta (o mesmo
+    modelo local do RAG), em vez de uma chamada ao LLM.
+    """
+
+    def __init__(self, embed_query: Callable[[str], List[float]],
+                 examples: Optional[Dict[str, List[str]]] = None,
+                 min_score: float = 0.3):
+        self._embed_query = embed_query
+        self._examples = examples or INTENT_EXAMPLES
+        self._min_score = min_score
+        self._centroids = None
+
+    def _build_centroids(self):
+        centroids = {}
+        for intent, phrases in self._examples.items():
+            vectors = [_normalize(self._embed_query(p)) for p in phrases]
+            centroids[intent] = _normalize([sum(col) / len(vectors) for col in zip(*vectors)])
+        return centroids
+
+    def classify(self, text: str) -> Optional[str]:
+        # Centróides calculados só no primeiro uso (não pesa no import)
+        if self._centroids is None:
+            self._centroids = self._build_centroids()
+
+        query = _normalize(self._embed_query(text))
+        scores = {
+            intent: sum(a * b for a, b in zip(query, centroid))
+            for intent, centroid in self._centroids.items()
+        }
+
+        intent = max(scores, key=scores.get)
+        return intent if scores[intent] >= self._min_score else None
+
+
+# ----------------------------------------------------------
+# 4. ROTEADOR (TRIE DE PREFIXOS)
+# ----------------------------------------------------------
+@dataclass
+class CommandSpec:
+    name: str
+    prefix: str
+    parser: Callable[[str], Any]
+    usage: str
+    description: str = ""
+
+
+@dataclass
+class _TrieNode:
+    children: Dict[str, "_TrieNode"] = field(default_factory=dict)
+    spec: Optional[CommandSpec] = None
+
+
+class CommandRouter:
+    """
+    Registro de comandos com despacho por trie: a mensagem é percorrida
+    uma única vez, caractere a caractere, até o prefixo mais longo que casar.
+    Não há lower() da mensagem inteira nem uma cadeia de startswith.
+    """
+
+    def __init__(self, classifier: Optional[EmbeddingIntentClassifier] = None):
+        self._root = _TrieNode()
+        self._specs: Dict[str, CommandSpec] = {}
+        self._classifier = classifier
+
+    def register(self, name: str, prefix: str, parser: Callable[[str], Any],
+                 usage: str, description: str = ""):
+        prefix = prefix.lower()
+        if name in self._specs:
+            raise ValueError(f"Comando já registrado: {name}")
+
+        spec = CommandSpec(name, prefix, parser, usage, description)
+        node = self._root
+        for ch in prefix:
+            child = node.children.setdefault(ch, _TrieNode())
+            # Maiúscula aponta para o mesmo nó: o despacho não chama lower()
+            node.children[ch.upper()] = child
+            node = child
+        if node.spec is not None:
+            raise ValueError(f"Prefixo já registrado: {prefix}")
+
+        node.spec = spec
+        self._specs[name] = spec
+        return spec
+
+    @property
+    def commands(self):
+        return list(self._specs.values())
+
+    def help_text(self) -> str:
+        return "\n".join(f"- {s.usage} — {s.description}" for s in self._specs.values())
+
+    def _match(self, text: str):
+        node = self._root
+        match = None
+
+        for i, ch in enumerate(text):
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.spec is not None:
+                match = (node.spec, i + 1)
+
+        return match
+
+    def route(self, message: str):
+        """
+        Retorna um comando tipado, um RouteError (formato inválido) ou uma
+        Question para mensagens sem comando.
+        """
+        text = message.strip()
+        match = self._match(text)
+
+        if match is None:
+            intent = self._classifier.classify(text) if self._classifier else None
+            return Question(text, intent)
+
+        spec, end = match
+        try:
+            return spec.parser(text[end:])
+        except ValueError as e:
+            return RouteError(spec.name, str(e), spec.usage)
+
+
+def build_router(classifier: Optional[EmbeddingIntentClassifier] = None) -> CommandRouter:
+    """
+    Roteador com os comandos padrão do sistema (usado pelo grafo e pela UI).
+    """
+    router = CommandRouter(classifier)
+
+    router.register(
+        "buscar", "buscar:", parse_buscar,
+        "buscar: consulta ; fonte=arquivo.pdf ; desde=AAAA-MM-DD",
+        "busca trechos nos PDFs indexados"
+    )
+    router.register(
+        "resumir", "resumir:", parse_resumir,
+        "resumir: texto",
+        "resume um texto"
+    )
+    router.register(
+        "votar", "votar:", parse_votar,
+        "votar: tema ; escolha",
+        "registra um voto (sim, não, abster)"
+    )
+    router.register(
+        "tarefa", "tarefa:", parse_tarefa,
+        "tarefa: descrição ; usuário ; prazo",
+        "cria uma tarefa"
+    )
+    router.register(
+        "ajuda", "ajuda:", lambda payload: HelpCommand(router.help_text()),
+        "ajuda:",
+        "lista os comandos disponíveis"
+    )
+
+    return router
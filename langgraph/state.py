@@ -15,6 +15,7 @@ class State(TypedDict, total=False):
 
     # RAG
     query: Optional[str]
+    filter: Optional[Dict[str, Any]]
 
     # Summarizer
     text: Optional[str]
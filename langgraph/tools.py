@@ -1,6 +1,7 @@
 import os
 import json
 import time
+import uuid
 
 # Diretórios
 LOG_DIR = "data/logs"
@@ -44,10 +45,32 @@ def summarizer_tool(text: str) -> str:
 # ----------------------------------------------------------
 # 3. VOTAÇÃO – (Coordenação)
 # ----------------------------------------------------------
+def load_tasks():
+    """
+    Lista as tarefas registradas em tasks.json.
+    """
+    if os.path.exists(TASK_FILE):
+        with open(TASK_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return []
+
+
+def task_exists(task_id: str) -> bool:
+    """
+    O tema de uma votação é sempre o ID de uma tarefa existente.
+    """
+    return any(t.get("id") == task_id for t in load_tasks())
+
+
 def vote_tool(topic: str, user: str, vote: str):
     """
     Registra votos, valida voto e retorna placar atualizado.
     """
+    # Valida antes de montar o caminho: temas livres (ou com "/") não
+    # podem virar arquivos de voto
+    if not task_exists(topic):
+        return {"error": f"Tarefa não encontrada: '{topic}'. Use o ID mostrado no dashboard."}
+
     vote = vote.lower().strip()
 
     if vote not in ["sim", "não", "nao", "abster"]:
@@ -89,15 +112,14 @@ def vote_tool(topic: str, user: str, vote: str):
 def create_task(description: str, assignee: str, deadline: str):
     """
     Criação e registro de tarefas no arquivo tasks.json.
+    Também inicializa o arquivo de votos da tarefa (mesmo registro usado
+    pelo dashboard do Streamlit e pelo comando tarefa: do grafo).
     """
     # Carregar tarefas atuais
-    if os.path.exists(TASK_FILE):
-        with open(TASK_FILE, "r", encoding="utf-8") as f:
-            tasks = json.load(f)
-    else:
-        tasks = []
+    tasks = load_tasks()
 
     new_task = {
+        "id": f"task_{str(uuid.uuid4())[:8]}",
         "task": description,
         "assignee": assignee,
         "deadline": deadline,
@@ -110,7 +132,11 @@ def create_task(description: str, assignee: str, deadline: str):
     with open(TASK_FILE, "w", encoding="utf-8") as f:
         json.dump(tasks, f, indent=2, ensure_ascii=False)
 
+    # Inicializar votos
+    with open(f"{VOTE_DIR}/{new_task['id']}.json", "w", encoding="utf-8") as f:
+        json.dump({"sim": 0, "não": 0, "abster": 0, "votes": []}, f, ensure_ascii=False)
+
     # Log
-    log_action({"type": "task", "task": description, "assignee": assignee})
+    log_action({"type": "task", "id": new_task["id"], "task": description, "assignee": assignee})
 
-    return tasks
+    return new_task
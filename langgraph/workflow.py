@@ -4,7 +4,10 @@ from typing import TypedDict, List, Dict, Any
 from tools import summarizer_tool, vote_tool, create_task, log_action
 
 # RAG
-from rag import get_retriever
+from rag import get_retriever, get_embeddings
+
+# Roteamento de comandos (compartilhado com o streamlit_app.py)
+from router import build_router, EmbeddingIntentClassifier, RouteError, HelpCommand, Question
 
 
 # StateGraph moderno
@@ -21,6 +24,7 @@ class GraphState(TypedDict, total=False):
     messages: List[Dict[str, Any]]
     tool: str
     query: str
+    filter: Dict[str, Any]
     text: str
     topic: str
     choice: str
@@ -32,54 +36,32 @@ class GraphState(TypedDict, total=False):
 # LLM offline - Qwen rodando no Ollama
 llm = Ollama(model="qwen2.5:1.5b")
 
+# Perguntas livres classificadas como "rag" pulam a chamada ao LLM
+router = build_router(classifier=EmbeddingIntentClassifier(get_embeddings().embed_query))
+
 
 # ----------------------------------------------------------
 # NODE 1 — LLM NODE
 # ----------------------------------------------------------
 def llm_node(state: GraphState):
 
-    last_message = state["messages"][-1]["content"].lower()
-
-    # Ferramentas ativadas por comando
-    if last_message.startswith("buscar:"):
-        query = last_message.replace("buscar:", "").strip()
-        return {"tool": "rag", "query": query}
-
-    if last_message.startswith("resumir:"):
-        text = last_message.replace("resumir:", "").strip()
-        return {"tool": "summarizer", "text": text}
-
-    if last_message.startswith("votar:"):
-        try:
-            _, rest = last_message.split(":", 1)
-            topic, choice = rest.split(";")
-            return {"tool": "vote", "topic": topic.strip(), "choice": choice.strip()}
-        except:
-            return {
-                "messages": state["messages"] + [
-                    {"role": "assistant", "content": "Formato inválido. Use: votar: tema ; escolha"}
-                ]
-            }
-
-    if last_message.startswith("tarefa:"):
-        try:
-            _, rest = last_message.split(":", 1)
-            desc, user, deadline = rest.split(";")
-            return {
-                "tool": "task",
-                "desc": desc.strip(),
-                "user": user.strip(),
-                "deadline": deadline.strip()
-            }
-        except:
-            return {
-                "messages": state["messages"] + [
-                    {"role": "assistant", "content": "Formato inválido. Use: tarefa: descrição ; usuário ; prazo"}
-                ]
-            }
+    result = router.route(state["messages"][-1]["content"])
+
+    # Formato inválido ou ajuda: responde direto, sem ferramenta
+    if isinstance(result, (RouteError, HelpCommand)):
+        reply = str(result) if isinstance(result, RouteError) else result.text
+        return {
+            "messages": state["messages"] + [
+                {"role": "assistant", "content": reply}
+            ]
+        }
+
+    # Comandos e perguntas sobre os documentos vão direto para a ferramenta
+    if not isinstance(result, Question) or result.intent == "rag":
+        return result.to_state()
 
     # Resposta normal do LLM
-    answer = llm.invoke(last_message)
+    answer = llm.invoke(result.text)
 
     return {
         "messages": state["messages"] + [
@@ -95,11 +77,11 @@ def rag_node(state: GraphState):
 
     query = state["query"]
     retriever = get_retriever("pdf_collection")   # seu índice
-    docs = retriever.get_relevant_documents(query)
+    docs = retriever.get_relevant_documents(query, filter=state.get("filter"))
 
     text = "\n".join([d.page_content for d in docs]) if docs else "Nenhum resultado encontrado."
 
-    log_action({"type": "rag_query", "query": query})
+    log_action({"type": "rag_query", "query": query, "filter": state.get("filter")})
 
     return {
         "messages": state["messages"] + [
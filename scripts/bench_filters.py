@@ -0,0 +1,137 @@
+"""
+Mede o custo de buscas com e sem filtro no retriever do RAG.
+
+Monta uma coleção temporária em memória (vetores aleatórios, metadata no
+formato da ingestão) e cronometra `_SimpleRetriever.get_relevant_documents`
+para cada cenário, ao lado da busca HNSW filtrada direta (o caminho usado
+antes do ranqueamento exato). Por padrão a consulta é embedada com o modelo
+local do RAG, como no app; com --stub-embeddings esse custo fica de fora.
+
+Uso (na raiz do projeto):
+    python scripts/bench_filters.py
+    python scripts/bench_filters.py --chunks 20000 --sources 100 --stub-embeddings
+    python scripts/bench_filters.py --exact-limit 2000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "langgraph"))
+
+import chromadb  # noqa: E402
+from langchain_community.vectorstores import Chroma  # noqa: E402
+
+from rag import _SimpleRetriever, get_embeddings, EXACT_SEARCH_LIMIT  # noqa: E402
+from filters import parse_filter  # noqa: E402
+
+
+DIM = 384  # all-MiniLM-L6-v2
+BATCH_SIZE = 1000
+
+
+class StubEmbeddings:
+    """Vetor aleatório determinístico: isola o custo do Chroma."""
+
+    def embed_query(self, text):
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(DIM)]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+def build_collection(client, chunks: int, sources: int, pages_per_source: int):
+    collection = client.create_collection(f"bench_{int(time.time())}")
+    rng = random.Random(0)
+    uploaded_at = int(time.time())
+
+    for start in range(0, chunks, BATCH_SIZE):
+        ids = list(range(start, min(start + BATCH_SIZE, chunks)))
+        collection.add(
+            ids=[str(i) for i in ids],
+            embeddings=[[rng.uniform(-1, 1) for _ in range(DIM)] for _ in ids],
+            documents=[f"trecho {i}" for i in ids],
+            metadatas=[
+                {
+                    "source": f"doc_{i % sources}.pdf",
+                    "user_id": "bench",
+                    "uploaded_at": uploaded_at,
+                    "page": (i // sources) % pages_per_source,
+                    "doc_hash": f"hash{i % sources}",
+                }
+                for i in ids
+            ]
+        )
+
+    return collection
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t0) / len(queries) * 1000
+
+
+def bench(label, retriever, vectorstore, where, queries):
+    current = timed(lambda q: retriever.get_relevant_documents(q, filter=where), queries)
+    if where is None:
+        print(f"{label:<34} {current:8.2f} ms/consulta")
+        return
+
+    matched = len(vectorstore._collection.get(where=where, include=[])["ids"])
+    hnsw = timed(lambda q: vectorstore.similarity_search(q, k=3, filter=where), queries)
+    print(f"{label:<34} {current:8.2f} ms/consulta   HNSW filtrado {hnsw:8.2f} ms"
+          f"   ganho {hnsw / current:5.1f}x   ({matched} trechos)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    # 200 trechos por documento: ordem de grandeza de um PDF real
+    parser.add_argument("--sources", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--stub-embeddings", action="store_true",
+                        help="não inclui o embedding da consulta na medição")
+    parser.add_argument("--exact-limit", type=int, default=EXACT_SEARCH_LIMIT,
+                        help="máximo de trechos ranqueados por distância exata")
+    args = parser.parse_args()
+
+    pages_per_source = max(1, args.chunks // args.sources // 2)
+
+    client = chromadb.EphemeralClient()
+    collection = build_collection(client, args.chunks, args.sources, pages_per_source)
+
+    vectorstore = Chroma(
+        client=client,
+        collection_name=collection.name,
+        embedding_function=StubEmbeddings() if args.stub_embeddings else get_embeddings()
+    )
+    retriever = _SimpleRetriever(vectorstore, k=3, exact_limit=args.exact_limit)
+    queries = [f"consulta de teste {i}" for i in range(args.queries)]
+
+    print(f"{args.chunks} trechos, {args.sources} documentos, "
+          f"{'sem' if args.stub_embeddings else 'com'} embedding da consulta, "
+          f"ranqueamento exato até {args.exact_limit} trechos")
+    retriever.get_relevant_documents("aquecimento")
+
+    bench("sem filtro", retriever, vectorstore, None, queries)
+    bench("fonte=", retriever, vectorstore, parse_filter(["fonte=doc_3.pdf"]), queries)
+    bench("fonte= + desde=", retriever, vectorstore,
+          parse_filter(["fonte=doc_3.pdf", "desde=2000-01-01"]), queries)
+    bench("pagina=", retriever, vectorstore, parse_filter(["pagina=3"]), queries)
+    bench("fonte= + pagina=", retriever, vectorstore,
+          parse_filter(["fonte=doc_3.pdf", "pagina=2"]), queries)
+    bench("hash= + pagina=", retriever, vectorstore,
+          parse_filter(["hash=hash3", "pagina=2"]), queries)
+    # Casa com a coleção inteira: acima do limite, cai na busca HNSW filtrada
+    bench("usuario= (acima do limite)", retriever, vectorstore,
+          parse_filter(["usuario=bench"]), queries)
+
+    client.delete_collection(collection.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Mede a latência do roteamento de mensagens do chat.
+
+Compara o roteador por trie (langgraph/router.py) com a cadeia antiga de
+lower() + startswith + split do llm_node. Com --intent, mede também o
+classificador de intenção usando o modelo de embeddings local do RAG.
+
+Uso (na raiz do projeto):
+    python scripts/bench_router.py
+    python scripts/bench_router.py --iterations 50000 --intent
+"""
+import os
+import sys
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "langgraph"))
+
+from router import build_router, EmbeddingIntentClassifier  # noqa: E402
+
+
+MESSAGES = [
+    "buscar: metas de vendas ; fonte=relatorio.pdf ; desde=2024-01-01",
+    "resumir: " + "texto longo para resumo " * 20,
+    "votar: task_1a2b3c4d ; sim",
+    "tarefa: revisar capítulo 2 ; ana ; 2024-07-01",
+    "votar: formato errado",
+    "qual o prazo de entrega definido no contrato?",
+    "olá, tudo bem?",
+    "Explique em detalhes o que os documentos dizem sobre o orçamento. " * 30,
+]
+
+
+def legacy_route(message: str):
+    """Cópia da cadeia de roteamento anterior (sem a chamada ao LLM)."""
+    last_message = message.lower()
+
+    if last_message.startswith("buscar:"):
+        return {"tool": "rag", "query": last_message.replace("buscar:", "").strip()}
+
+    if last_message.startswith("resumir:"):
+        return {"tool": "summarizer", "text": last_message.replace("resumir:", "").strip()}
+
+    if last_message.startswith("votar:"):
+        try:
+            _, rest = last_message.split(":", 1)
+            topic, choice = rest.split(";")
+            return {"tool": "vote", "topic": topic.strip(), "choice": choice.strip()}
+        except ValueError:
+            return {"error": "votar"}
+
+    if last_message.startswith("tarefa:"):
+        try:
+            _, rest = last_message.split(":", 1)
+            desc, user, deadline = rest.split(";")
+            return {"tool": "task", "desc": desc.strip(), "user": user.strip(),
+                    "deadline": deadline.strip()}
+        except ValueError:
+            return {"error": "tarefa"}
+
+    return None
+
+
+def bench(label, fn, iterations):
+    total = timeit.timeit(lambda: [fn(m) for m in MESSAGES], number=iterations)
+    per_msg = total / (iterations * len(MESSAGES)) * 1e6
+    print(f"{label:<28} {per_msg:8.2f} µs/mensagem")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--intent", action="store_true",
+                        help="inclui o classificador de intenção (carrega o modelo de embeddings)")
+    args = parser.parse_args()
+
+    router = build_router()
+    bench("legado (startswith)", legacy_route, args.iterations)
+    # Só a escolha do comando, sem parser: comparável ao legado sem split
+    bench("trie (só despacho)", router._match, args.iterations)
+    bench("trie (sem classificador)", router.route, args.iterations)
+
+    if args.intent:
+        from rag import get_embeddings
+
+        classifier = EmbeddingIntentClassifier(get_embeddings().embed_query)
+        routed = build_router(classifier=classifier)
+        routed.route("aquecimento")  # calcula os centróides fora da medição
+        bench("trie + classificador", routed.route, max(1, args.iterations // 1000))
+
+
+if __name__ == "__main__":
+    main()
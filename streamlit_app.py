@@ -4,16 +4,18 @@ import os
 import uuid
 import json
 from pathlib import Path
-from datetime import datetime
-
-# RAG & embeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
 # RAG helper
-from langgraph.rag import build_vectorstore, get_retriever
+from langgraph.rag import get_retriever
+# Roteamento de comandos (compartilhado com o grafo)
+from langgraph.router import (
+    build_router, RouteError, HelpCommand, SearchCommand,
+    SummarizeCommand, VoteCommand, TaskCommand
+)
+# Fila de indexação em background
+from langgraph.ingest import IngestWorkerPool, list_jobs, cancel_job, PENDING_STATES
 # Ferramentas
-from langgraph.tools import vote_tool, log_action, summarizer_tool
+from langgraph.tools import vote_tool, log_action, summarizer_tool, create_task
 # LLM local
 from langchain_community.llms import Ollama
 
@@ -33,6 +35,24 @@ os.makedirs(VOTES_DIR, exist_ok=True)
 # LLM offline via Ollama
 llm = Ollama(model="qwen2.5:1.5b")
 
+# Comandos do chat (buscar:, resumir:, votar:, tarefa:, ajuda:)
+router = build_router()
+
+
+def load_tasks():
+    if TASK_FILE.exists():
+        with open(TASK_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return []
+
+
+def add_dashboard_task(desc: str, assignee: str, deadline: str) -> str:
+    """
+    Cria a tarefa (com arquivo de votos) via tools.create_task.
+    Usada pelo formulário e pelo comando tarefa: do chat.
+    """
+    return create_task(desc, assignee, deadline)["id"]
+
 
 # -------------------------------
 # CONFIG STREAMLIT
@@ -44,6 +64,14 @@ st.set_page_config(
 
 st.title("📚 Sistema Colaborativo — Chat RAG + Dashboard de Tarefas")
 
+# Pool de workers único por processo (sobrevive a reruns e refresh do navegador)
+@st.cache_resource
+def get_ingest_pool():
+    return IngestWorkerPool(workers=2).start()
+
+
+ingest_pool = get_ingest_pool()
+
 # Session State
 if "user_id" not in st.session_state:
     st.session_state.user_id = f"user_{str(uuid.uuid4())[:6]}"
@@ -67,27 +95,40 @@ with st.sidebar:
         if not uploaded_files:
             st.warning("Envie ao menos um PDF.")
         else:
-            embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            docs = []
-
             for pdf in uploaded_files:
-                temp_name = f"{uuid.uuid4()}_{pdf.name}"
-                with open(temp_name, "wb") as f:
-                    f.write(pdf.getvalue())
-
-                loader = PyPDFLoader(temp_name)
-                try:
-                    pages = loader.load_and_split()
-                except:
-                    pages = loader.load()
-
-                docs.extend(pages)
-                os.remove(temp_name)
-
-            build_vectorstore(docs, collection_name="pdf_collection")
-
-            st.success(f"{len(docs)} páginas indexadas na coleção.")
-            log_action({"type": "index", "count": len(docs), "user": st.session_state.user_id})
+                ingest_pool.submit(
+                    pdf.getvalue(),
+                    pdf.name,
+                    st.session_state.user_id,
+                    collection_name="pdf_collection"
+                )
+
+            st.success(f"{len(uploaded_files)} PDF(s) enviados para a fila de indexação.")
+
+    # Progresso dos jobs (polling manual: o job continua mesmo sem a página aberta)
+    jobs = list_jobs()
+    if jobs:
+        st.subheader("⏳ Indexações")
+        st.button("🔄 Atualizar", key="jobs_refresh")
+
+        for job in jobs[:10]:
+            total = job["total_chunks"] or 0
+            st.write(f"**{job['filename']}** — `{job['status']}`")
+            if total:
+                st.progress(job["chunks_stored"] / total)
+            st.caption(
+                f"trechos lidos: {job['chunks_parsed']} · embeddings: {job['chunks_embedded']}"
+                f" · gravados: {job['chunks_stored']}/{total or '?'}"
+            )
+            if job["error"]:
+                st.caption(f"erro: {job['error']}")
+
+            if job["status"] in PENDING_STATES and not job["cancel_requested"]:
+                if st.button("✖ Cancelar", key=f"{job['id']}_cancel"):
+                    res = cancel_job(job["id"])
+                    if res.get("error"):
+                        st.warning(res["error"])
+                    st.rerun()
 
     st.markdown("---")
     st.header("👤 Identificação")
@@ -112,7 +153,7 @@ for msg in st.session_state.messages:
 
 # Input
 user_input = st.text_input(
-    "Digite aqui (buscar:, resumir: ou pergunta livre sobre os PDFs)",
+    "Digite aqui (buscar:, resumir:, votar:, tarefa:, ajuda: ou pergunta livre sobre os PDFs)",
     key="chat_input"
 )
 
@@ -126,28 +167,57 @@ if st.button("Enviar mensagem"):
         )
         log_action({"type": "message", "content": text})
 
+        result = router.route(text)
+
+        # formato inválido / ajuda
+        if isinstance(result, RouteError):
+            st.session_state.messages.append(
+                {"role": "assistant", "content": str(result)}
+            )
+
+        elif isinstance(result, HelpCommand):
+            st.session_state.messages.append(
+                {"role": "assistant", "content": result.text}
+            )
+
         # buscar:
-        if text.lower().startswith("buscar:"):
-            query = text.split(":", 1)[1].strip()
+        elif isinstance(result, SearchCommand):
             retriever = get_retriever("pdf_collection")
-            docs = retriever.get_relevant_documents(query)
-            ans = "\n\n".join([d.page_content for d in docs])
+            docs = retriever.get_relevant_documents(result.query, filter=result.filter)
+            ans = "\n\n".join([d.page_content for d in docs]) or "Nenhum resultado encontrado."
             st.session_state.messages.append(
                 {"role": "assistant", "content": ans}
             )
 
         # resumir:
-        elif text.lower().startswith("resumir:"):
-            payload = text.split(":", 1)[1].strip()
-            summary = summarizer_tool(payload)
+        elif isinstance(result, SummarizeCommand):
+            summary = summarizer_tool(result.text)
             st.session_state.messages.append(
                 {"role": "assistant", "content": summary}
             )
 
+        # votar: (o tema é o ID da tarefa no dashboard)
+        elif isinstance(result, VoteCommand):
+            res = vote_tool(result.topic, st.session_state.user_id, result.choice)
+            if isinstance(res, dict) and res.get("error"):
+                ans = res["error"]
+            else:
+                ans = f"Voto registrado: {result.choice}"
+            st.session_state.messages.append(
+                {"role": "assistant", "content": ans}
+            )
+
+        # tarefa:
+        elif isinstance(result, TaskCommand):
+            tid = add_dashboard_task(result.desc, result.user, result.deadline)
+            st.session_state.messages.append(
+                {"role": "assistant", "content": f"Tarefa criada ({tid})"}
+            )
+
         # pergunta livre -> RAG + LLM
         else:
             retriever = get_retriever("pdf_collection")
-            docs = retriever.get_relevant_documents(text)
+            docs = retriever.get_relevant_documents(result.text)
             ctx = "\n\n".join([d.page_content for d in docs])
 
             prompt = f"""Responda usando o contexto abaixo (trechos dos PDFs):
@@ -155,7 +225,7 @@ CONTEXT:
 {ctx}
 
 PERGUNTA:
-{text}
+{result.text}
 """
 
             answer = llm.invoke(prompt)
@@ -173,11 +243,7 @@ st.markdown("---")
 st.markdown("## 📋 Dashboard de Tarefas e Votações")
 
 # Carrega tarefas
-if TASK_FILE.exists():
-    with open(TASK_FILE, "r", encoding="utf-8") as f:
-        tasks = json.load(f)
-else:
-    tasks = []
+tasks = load_tasks()
 
 
 # -------------------------------
@@ -190,24 +256,7 @@ new_assignee = st.text_input("Responsável", key="new_assignee")
 new_deadline = st.date_input("Prazo limite", key="new_deadline")
 
 if st.button("Criar tarefa"):
-    tid = f"task_{str(uuid.uuid4())[:8]}"
-
-    task = {
-        "id": tid,
-        "task": new_desc.strip(),
-        "assignee": new_assignee.strip(),
-        "deadline": str(new_deadline),
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-
-    tasks.append(task)
-    with open(TASK_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, indent=2, ensure_ascii=False)
-
-    # inicializar votos
-    vote_file = VOTES_DIR / f"{tid}.json"
-    with open(vote_file, "w", encoding="utf-8") as f:
-        json.dump({"sim": 0, "não": 0, "abster": 0, "votes": []}, f)
+    tid = add_dashboard_task(new_desc.strip(), new_assignee.strip(), str(new_deadline))
 
     st.success(f"Tarefa criada ({tid})")
     st.rerun()
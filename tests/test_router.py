@@ -0,0 +1,124 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "langgraph"))
+
+from router import (  # noqa: E402
+    CommandRouter, build_router, RouteError, Question, HelpCommand,
+    SearchCommand, SummarizeCommand, VoteCommand, TaskCommand,
+)
+from filters import parse_filter  # noqa: E402
+
+
+@pytest.fixture
+def router():
+    return build_router()
+
+
+# ----------------------------------------------------------
+# 1. DESPACHO PELA TRIE
+# ----------------------------------------------------------
+def test_longest_prefix_wins():
+    r = CommandRouter()
+    r.register("curto", "bus", lambda payload: ("curto", payload), "bus")
+    r.register("longo", "buscar:", lambda payload: ("longo", payload), "buscar:")
+
+    assert r.route("buscar: x") == ("longo", " x")
+    # Diverge depois de "bus": fica com o prefixo mais longo que casou
+    assert r.route("busca x") == ("curto", "ca x")
+
+
+def test_duplicate_prefix_rejected():
+    r = CommandRouter()
+    r.register("a", "cmd:", lambda payload: payload, "cmd:")
+    with pytest.raises(ValueError):
+        r.register("b", "CMD:", lambda payload: payload, "cmd:")
+
+
+@pytest.mark.parametrize("message", ["buscar: metas", "BUSCAR: metas", "Buscar: metas", "  bUsCaR:metas"])
+def test_prefix_is_case_insensitive(router, message):
+    assert router.route(message) == SearchCommand("metas", None)
+
+
+def test_payload_keeps_case(router):
+    assert router.route("Resumir: Texto Original") == SummarizeCommand("Texto Original")
+
+
+def test_commands(router):
+    assert router.route("votar: task_1a2b3c4d ; sim") == VoteCommand("task_1a2b3c4d", "sim")
+    assert router.route("tarefa: revisar ; ana ; 2024-07-01") == TaskCommand("revisar", "ana", "2024-07-01")
+    assert isinstance(router.route("ajuda:"), HelpCommand)
+
+
+def test_message_without_command_is_question(router):
+    assert router.route("qual o prazo?") == Question("qual o prazo?", None)
+    assert router.route("buscar sem dois pontos") == Question("buscar sem dois pontos", None)
+
+
+# ----------------------------------------------------------
+# 2. ERROS DE FORMATO
+# ----------------------------------------------------------
+@pytest.mark.parametrize("message, command", [
+    ("votar: formato errado", "votar"),
+    ("votar: tema ; ", "votar"),
+    ("votar: a ; b ; c", "votar"),
+    ("tarefa: só descrição", "tarefa"),
+    ("tarefa: revisar ; ; 2024-07-01", "tarefa"),
+    ("buscar: metas ; pagina=0", "buscar"),
+    ("buscar: metas ; pagina=abc", "buscar"),
+    ("buscar: metas ; desde=2024-13-01", "buscar"),
+    ("buscar: metas ; ate=ontem", "buscar"),
+    ("buscar: metas ; autor=ana", "buscar"),
+    ("buscar: metas ; fonte", "buscar"),
+    ("buscar:  ; fonte=a.pdf", "buscar"),
+])
+def test_route_error(router, message, command):
+    result = router.route(message)
+
+    assert isinstance(result, RouteError)
+    assert result.command == command
+    assert str(result).endswith(f"Use: {result.usage}")
+    assert str(result).count("Use:") == 1
+
+
+# ----------------------------------------------------------
+# 3. FORMATO DO "where"
+# ----------------------------------------------------------
+def test_no_filter():
+    assert parse_filter([]) is None
+
+
+def test_single_clause_is_not_wrapped():
+    assert parse_filter(["fonte=relatorio.pdf"]) == {"source": "relatorio.pdf"}
+
+
+def test_page_is_zero_based_int():
+    assert parse_filter(["pagina=3"]) == {"page": 2}
+
+
+def test_keys_are_case_insensitive():
+    assert parse_filter([" Usuario = ana "]) == {"user_id": "ana"}
+
+
+def test_multiple_clauses_use_and():
+    since = int(datetime(2024, 1, 1).timestamp())
+    until = int(datetime(2024, 6, 30, 23, 59, 59).timestamp())
+
+    assert parse_filter(["hash=abc", "desde=2024-01-01", "ate=2024-06-30"]) == {
+        "$and": [
+            {"doc_hash": "abc"},
+            {"uploaded_at": {"$gte": since}},
+            {"uploaded_at": {"$lte": until}},
+        ]
+    }
+
+
+def test_search_command_carries_where(router):
+    result = router.route("buscar: metas de vendas ; fonte=a.pdf ; pagina=1")
+
+    assert result == SearchCommand("metas de vendas", {"$and": [{"source": "a.pdf"}, {"page": 0}]})
+    assert result.to_state() == {"tool": "rag", "query": "metas de vendas",
+                                 "filter": {"$and": [{"source": "a.pdf"}, {"page": 0}]}}